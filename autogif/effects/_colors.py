@@ -0,0 +1,57 @@
+from functools import lru_cache
+import re
+
+# Validated hex forms; short #rgb is expanded to the canonical #rrggbb
+_HEX6_RE = re.compile(r'^#[0-9a-fA-F]{6}$')
+_HEX3_RE = re.compile(r'^#[0-9a-fA-F]{3}$')
+
+# Matches rgb()/rgba() strings and captures the three color channels
+_COLOR_RE = re.compile(
+    r'^rgba?\(\s*([-+]?[\d.]+)\s*,\s*([-+]?[\d.]+)\s*,\s*([-+]?[\d.]+)\s*(?:,[^)]*)?\)$'
+)
+
+def parse_color_to_pil_format(color_input):
+    """
+    Converts various color formats to PIL-compatible format.
+    Handles hex, rgb(), rgba(), and CSS color names.
+    Returns hex string or RGB tuple.
+    """
+    if not color_input:
+        return "#FFFFFF"
+    
+    if isinstance(color_input, str):
+        return _parse_color_str(color_input)
+    
+    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
+        try:
+            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
+            r = max(0, min(255, r))
+            g = max(0, min(255, g))
+            b = max(0, min(255, b))
+            return '#%02x%02x%02x' % (r, g, b)
+        except (ValueError, IndexError):
+            pass
+    
+    return str(color_input).strip()
+
+@lru_cache(maxsize=256)
+def _parse_color_str(color_str):
+    """Parses a color string; colors are constant across a caption, so results are cached."""
+    color_str = color_str.strip()
+    
+    if _HEX6_RE.match(color_str):
+        return color_str
+    
+    if _HEX3_RE.match(color_str):
+        return '#' + color_str[1] * 2 + color_str[2] * 2 + color_str[3] * 2
+    
+    match = _COLOR_RE.match(color_str)
+    if match:
+        try:
+            r, g, b = (max(0, min(255, int(float(v)))) for v in match.groups())
+            return '#%02x%02x%02x' % (r, g, b)
+        except ValueError:
+            pass
+    
+    # Assume anything else is a color PIL understands, e.g. CSS names like "red"
+    return color_str
@@ -6,6 +6,14 @@ class EffectBase(ABC):
     Each effect plugin must inherit from this class.
     """
 
+    # Every subclass in definition order, so plugin loading can pick up the classes a
+    # plugin module defines without scanning the module's attributes
+    _registry: list[type['EffectBase']] = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        EffectBase._registry.append(cls)
+
     @property
     @abstractmethod
     def slug(self) -> str:
@@ -1,59 +1,8 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont, ImageChops
 import random
 
-def parse_color_to_pil_format(color_input):
-    """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
-    """
-    if not color_input:
-        return "#FFFFFF"
-    
-    color_str = str(color_input).strip()
-    
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    return color_str
-
 class GlitchEffect(EffectBase):
     @property
     def slug(self) -> str:
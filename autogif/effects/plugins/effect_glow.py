@@ -1,68 +1,9 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
 import numpy as np
 import math
 
-def parse_color_to_pil_format(color_input):
-    """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
-    """
-    if not color_input:
-        return "#FFFFFF"  # Default to white
-    
-    color_str = str(color_input).strip()
-    
-    # If it's already a hex color, return as-is
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    # Handle rgba() format like "rgba(255, 0, 54.86158590292658, 1)"
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            # Extract values from rgba(r, g, b, a)
-            values_str = color_str[5:-1]  # Remove "rgba(" and ")"
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                # Clamp values to 0-255 range
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # Handle rgb() format like "rgb(255, 0, 54)"
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]  # Remove "rgb(" and ")"
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # If it's a tuple or list, convert to hex
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # If all else fails, assume it's a valid PIL color and return as-is
-    # This handles CSS color names like "red", "blue", etc.
-    return color_str
-
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
     
@@ -1,68 +1,9 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont
 import math
 import random
 
-def parse_color_to_pil_format(color_input):
-    """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
-    """
-    if not color_input:
-        return "#FFFFFF"  # Default to white
-    
-    color_str = str(color_input).strip()
-    
-    # If it's already a hex color, return as-is
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    # Handle rgba() format like "rgba(255, 0, 54.86158590292658, 1)"
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            # Extract values from rgba(r, g, b, a)
-            values_str = color_str[5:-1]  # Remove "rgba(" and ")"
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                # Clamp values to 0-255 range
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # Handle rgb() format like "rgb(255, 0, 54)"
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]  # Remove "rgb(" and ")"
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # If it's a tuple or list, convert to hex
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    # If all else fails, assume it's a valid PIL color and return as-is
-    # This handles CSS color names like "red", "blue", etc.
-    return color_str
-
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
     
@@ -137,28 +78,9 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
         
         return True
     
-    # Single line text (original logic)
-    try:
-        # Try modern PIL approach with stroke support
-        if hasattr(draw, "text") and hasattr(draw, "textbbox"):
-            # Test if stroke_width parameter is supported
-            draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
-                     stroke_width=outline_width, stroke_fill=pil_outline_color)
-            return True
-    except (TypeError, AttributeError):
-        pass
-    
-    # Fallback to manual outline drawing for older PIL versions
-    if outline_width > 0:
-        # Draw outline by drawing text multiple times with offsets
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:
-                    outline_pos = (position[0] + dx, position[1] + dy)
-                    draw.text(outline_pos, text, font=font, fill=pil_outline_color, anchor=anchor)
-    
-    # Draw main text
-    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor)
+    # Single line text; Pillow >= 10 always supports stroke_width/stroke_fill
+    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
+             stroke_width=outline_width, stroke_fill=pil_outline_color)
     return True
 
 class ShakeEffect(EffectBase):
@@ -192,6 +114,7 @@ class ShakeEffect(EffectBase):
         
         # Random phase offsets for each frequency to avoid predictable patterns
         for freq_data in self.shake_frequencies:
+            freq_data['omega'] = 2 * math.pi * freq_data['freq']  # Angular frequency, constant per component
             freq_data['x_phase'] = random.uniform(0, 2 * math.pi)
             freq_data['y_phase'] = random.uniform(0, 2 * math.pi)
 
@@ -220,8 +143,8 @@ class ShakeEffect(EffectBase):
         # Combine multiple frequency components
         for freq_data in self.shake_frequencies:
             # Calculate sine waves for this frequency
-            x_component = math.sin(2 * math.pi * freq_data['freq'] * frame_time + freq_data['x_phase'])
-            y_component = math.sin(2 * math.pi * freq_data['freq'] * frame_time + freq_data['y_phase'])
+            x_component = math.sin(freq_data['omega'] * frame_time + freq_data['x_phase'])
+            y_component = math.sin(freq_data['omega'] * frame_time + freq_data['y_phase'])
             
             # Scale by amplitude
             amplitude = base_amplitude * freq_data['amp_scale']
@@ -254,7 +177,7 @@ class ShakeEffect(EffectBase):
             frame_image = frame_image.convert("RGBA")
         
         # Create a new blank canvas since shake replaces all text rendering
-        blank_canvas = Image.new("RGBA", frame_image.size, (0, 0, 0, 0))
+        blank_canvas = Image.new("RGBA", frame_image.size, 0)
         
         if not text:
             return blank_canvas
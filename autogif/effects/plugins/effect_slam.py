@@ -1,97 +1,71 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont
 import math
+import zlib
+import numpy as np
 
-def parse_color_to_pil_format(color_input):
+MAX_CACHED_LAYOUTS = 256
+_wrap_cache = {}
+
+def wrap_text_lines(draw, text, font, max_width):
     """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
+    Word-wraps text to max_width and measures the line height.
+    Captions are redrawn with the same text and font every frame, so layouts are cached.
+    Returns (lines, line_height).
     """
-    if not color_input:
-        return "#FFFFFF"
-    
-    color_str = str(color_input).strip()
+    key = (font, text, max_width)
+    layout = _wrap_cache.get(key)
+    if layout is not None:
+        return layout
     
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
+    words = text.split(' ')
+    lines = []
+    current_line = []
     
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
+    for word in words:
+        test_line = ' '.join(current_line + [word])
         try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+            bbox = draw.textbbox((0, 0), test_line, font=font)
+            line_width = bbox[2] - bbox[0]
+        except AttributeError:
+            # Fallback for older PIL versions
+            line_width = draw.textsize(test_line, font=font)[0]
+        
+        if line_width <= max_width or not current_line:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
     
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    if current_line:
+        lines.append(' '.join(current_line))
     
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Calculate line height
+    try:
+        bbox = draw.textbbox((0, 0), "Ay", font=font)
+        line_height = bbox[3] - bbox[1]
+    except AttributeError:
+        line_height = draw.textsize("Ay", font=font)[1]
     
-    return color_str
+    layout = (tuple(lines), line_height)
+    if len(_wrap_cache) >= MAX_CACHED_LAYOUTS:
+        # Evict the oldest entry
+        del _wrap_cache[next(iter(_wrap_cache))]
+    _wrap_cache[key] = layout
+    return layout
 
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
     
-    # Convert colors to PIL-compatible format
-    pil_font_color = parse_color_to_pil_format(font_color)
+    # Convert colors to PIL-compatible format; RGB tuples are already accepted by PIL as-is
+    pil_font_color = font_color if isinstance(font_color, tuple) else parse_color_to_pil_format(font_color)
     pil_outline_color = parse_color_to_pil_format(outline_color)
     
     # Handle multi-line text if max_width is specified
     if max_width and len(text) > 0:
-        words = text.split(' ')
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            try:
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                line_width = bbox[2] - bbox[0]
-            except AttributeError:
-                # Fallback for older PIL versions
-                line_width = draw.textsize(test_line, font=font)[0]
-            
-            if line_width <= max_width or not current_line:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        # Calculate line height
-        try:
-            bbox = draw.textbbox((0, 0), "Ay", font=font)
-            line_height = bbox[3] - bbox[1]
-        except AttributeError:
-            line_height = draw.textsize("Ay", font=font)[1]
+        lines, line_height = wrap_text_lines(draw, text, font, max_width)
         
         # Calculate total text block height and adjust position
         total_height = len(lines) * line_height + (len(lines) - 1) * 4  # 4px line spacing
@@ -128,30 +102,71 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
         
         return True
     
-    # Single line text (original logic)
-    try:
-        # Try modern PIL approach with stroke support
-        if hasattr(draw, "text") and hasattr(draw, "textbbox"):
-            # Test if stroke_width parameter is supported
-            draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
-                     stroke_width=outline_width, stroke_fill=pil_outline_color)
-            return True
-    except (TypeError, AttributeError):
-        pass
-    
-    # Fallback to manual outline drawing for older PIL versions
-    if outline_width > 0:
-        # Draw outline by drawing text multiple times with offsets
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:
-                    outline_pos = (position[0] + dx, position[1] + dy)
-                    draw.text(outline_pos, text, font=font, fill=pil_outline_color, anchor=anchor)
-    
-    # Draw main text
-    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor)
+    # Single line text; Pillow >= 10 always supports stroke_width/stroke_fill
+    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
+             stroke_width=outline_width, stroke_fill=pil_outline_color)
     return True
 
+MAX_CACHED_FONTS = 64
+MAX_CACHED_REST_TILES = 64
+_scaled_font_cache = {}
+
+def get_scaled_font(font_path, size):
+    """
+    Returns a truetype font for (font_path, size), loading each size only once.
+    The impact compression revisits the same handful of sizes on every slam.
+    """
+    key = (font_path, size)
+    scaled_font = _scaled_font_cache.get(key)
+    if scaled_font is None:
+        scaled_font = ImageFont.truetype(font_path, size)
+        if len(_scaled_font_cache) >= MAX_CACHED_FONTS:
+            # Evict the oldest entry
+            del _scaled_font_cache[next(iter(_scaled_font_cache))]
+        _scaled_font_cache[key] = scaled_font
+    return scaled_font
+
+def slam_kinematics(slam_progress, drop_height, max_shockwave_radius, bounce_dampening):
+    """
+    Computes the slam pose for a progress value in [0, 1).
+    Pure scalar math so it can be shared by the first slam and the repeat cycles.
+    Returns (y_offset, shockwave_radius, text_scale).
+    """
+    # Phase 1: Drop (first 60% of slam)
+    if slam_progress < 0.6:
+        drop_progress = slam_progress / 0.6
+        
+        # Accelerating drop (gravity effect)
+        gravity_factor = drop_progress * drop_progress  # Quadratic acceleration
+        y_offset = -drop_height * (1.0 - gravity_factor)
+        
+        # No shockwave during drop
+        shockwave_radius = 0
+        text_scale = 1.0
+        
+    # Phase 2: Impact and bounce (last 40% of slam)
+    else:
+        impact_progress = (slam_progress - 0.6) / 0.4
+        
+        # Bounce effect with dampening
+        bounce_cycles = 2  # Number of bounces
+        bounce_value = math.sin(impact_progress * bounce_cycles * math.pi)
+        bounce_height = drop_height * 0.3 * bounce_value * (1.0 - impact_progress)
+        
+        y_offset = -bounce_height * bounce_dampening
+        
+        # Shockwave expanding from impact
+        shockwave_radius = impact_progress * max_shockwave_radius
+        
+        # Text compression on impact
+        if impact_progress < 0.3:
+            compression_factor = 1.0 - (impact_progress / 0.3) * 0.2  # Compress by 20%
+            text_scale = compression_factor
+        else:
+            text_scale = 0.8 + ((impact_progress - 0.3) / 0.7) * 0.2  # Restore to normal
+    
+    return y_offset, shockwave_radius, text_scale
+
 class SlamEffect(EffectBase):
     @property
     def slug(self) -> str:
@@ -169,7 +184,8 @@ class SlamEffect(EffectBase):
     def default_intensity(self) -> int:
         return 75
 
-    def prepare(self, target_fps: int, caption_natural_duration_sec: float, text_length: int, intensity: int = None, **kwargs) -> None:
+    def prepare(self, target_fps: int, caption_natural_duration_sec: float, text_length: int, intensity: int = None,
+                font_color=None, outline_color=None, **kwargs) -> None:
         """Calculate slam animation timing"""
         if intensity is None:
             intensity = kwargs.get('intensity', self.default_intensity)
@@ -185,6 +201,83 @@ class SlamEffect(EffectBase):
         self.drop_height = 50 + (intensity / 100.0) * 100  # How far text drops from
         self.max_shockwave_radius = 80 + (intensity / 100.0) * 120  # Max shockwave size
         self.bounce_dampening = 0.7  # How much bounce reduces each time
+        
+        if font_color is not None:
+            self._prepare_colors(font_color, outline_color)
+
+    def _prepare_colors(self, font_color, outline_color) -> None:
+        """Parse caption colors and decode the font RGB, skipping the work while colors are unchanged"""
+        color_key = (font_color, outline_color)
+        if getattr(self, '_color_key', None) == color_key:
+            return
+        
+        self._font_pil = parse_color_to_pil_format(font_color)
+        self._outline_pil = parse_color_to_pil_format(outline_color)
+        
+        # Base RGB for the impact color blend
+        hex_digits = self._font_pil[1:] if self._font_pil.startswith('#') else ''
+        try:
+            self._orig_rgb = (int(hex_digits[0:2], 16), int(hex_digits[2:4], 16), int(hex_digits[4:6], 16))
+        except ValueError:
+            self._orig_rgb = (255, 255, 255)
+        
+        self._color_key = color_key
+
+    def _slam_progress(self, frame_time: float):
+        """Progress (0-1) through the current slam, or None while resting between slam cycles"""
+        slam_duration = self.slam_frames / max(1, self.fps)
+        
+        if frame_time >= slam_duration:
+            # Create repeating slam cycles for word-level effects
+            # Add a pause between slams and repeat the animation
+            slam_cycle_duration = slam_duration + 2.0  # 2 second pause between slams
+            frame_time = frame_time % slam_cycle_duration
+            if frame_time >= slam_duration:
+                return None
+        
+        return frame_time / max(0.1, slam_duration)
+
+    def _phase(self, slam_progress: float) -> tuple[float, float, float]:
+        """Returns (y_offset, shockwave_radius, text_scale) for a slam progress value"""
+        return slam_kinematics(slam_progress, self.drop_height, self.max_shockwave_radius, self.bounce_dampening)
+
+    def _render_rest_canvas(self, size, text, font, outline_width, text_anchor_x, text_anchor_y, frame_width):
+        """
+        Renders the text at rest (no drop, shockwave or scaling).
+        The result is identical for every rest frame, so the drawn text is cached as
+        a cropped tile and pasted onto a fresh canvas on later frames.
+        """
+        if not hasattr(self, '_rest_tiles'):
+            self._rest_tiles = {}
+        
+        blank_canvas = Image.new("RGBA", size, 0)
+        key = (size, text, font, self._font_pil, self._outline_pil, outline_width,
+               text_anchor_x, text_anchor_y, frame_width)
+        cached = self._rest_tiles.get(key)
+        if cached is not None:
+            tile, offset = cached
+            if tile is not None:
+                blank_canvas.paste(tile, offset)
+            return blank_canvas
+        
+        draw_text_with_outline(
+            ImageDraw.Draw(blank_canvas), 
+            (text_anchor_x, text_anchor_y), 
+            text,
+            font, 
+            self._font_pil, 
+            self._outline_pil, 
+            outline_width, 
+            anchor="mm",
+            max_width=int(frame_width * 0.9)
+        )
+        
+        bbox = blank_canvas.getbbox()
+        if len(self._rest_tiles) >= MAX_CACHED_REST_TILES:
+            # Evict the oldest entry
+            del self._rest_tiles[next(iter(self._rest_tiles))]
+        self._rest_tiles[key] = (blank_canvas.crop(bbox), bbox[:2]) if bbox else (None, None)
+        return blank_canvas
 
     def transform(self, frame_image: Image.Image, text: str, base_position: tuple[int, int],
                   current_frame_index: int, intensity: int,
@@ -196,26 +289,13 @@ class SlamEffect(EffectBase):
         """
         Applies a slam effect where text drops down and impacts with shockwaves.
         """
-        if frame_image.mode != "RGBA":
-            frame_image = frame_image.convert("RGBA")
-        
-        # Create blank canvas for text
-        blank_canvas = Image.new("RGBA", frame_image.size, (0, 0, 0, 0))
+        # Parsed colors are cached on the instance and only recomputed when they change
+        self._prepare_colors(font_color, outline_color)
         
         if not text or intensity == 0:
             # No slam, draw normally with multi-line support
-            draw_text_with_outline(
-                ImageDraw.Draw(blank_canvas), 
-                (text_anchor_x, text_anchor_y), 
-                text,
-                font, 
-                font_color, 
-                outline_color, 
-                outline_width, 
-                anchor="mm",
-                max_width=int(frame_width * 0.9)
-            )
-            return blank_canvas
+            return self._render_rest_canvas(frame_image.size, text, font, outline_width,
+                                            text_anchor_x, text_anchor_y, frame_width)
         
         # Ensure slam is prepared
         if not hasattr(self, 'slam_frames'):
@@ -225,95 +305,22 @@ class SlamEffect(EffectBase):
             self.max_shockwave_radius = 150
             self.bounce_dampening = 0.7
         
-        draw = ImageDraw.Draw(blank_canvas)
-        
         # Calculate slam animation progress using time-based approach
         # This allows word-level effects to work regardless of global frame index
         frame_time = current_frame_index / max(1, self.fps)
-        slam_duration = self.slam_frames / max(1, self.fps)
+        slam_progress = self._slam_progress(frame_time)
         
-        if frame_time < slam_duration:
-            slam_progress = frame_time / max(0.1, slam_duration)
-            
-            # Phase 1: Drop (first 60% of slam)
-            if slam_progress < 0.6:
-                drop_progress = slam_progress / 0.6
-                
-                # Accelerating drop (gravity effect)
-                gravity_factor = drop_progress * drop_progress  # Quadratic acceleration
-                y_offset = -self.drop_height * (1.0 - gravity_factor)
-                
-                # No shockwave during drop
-                shockwave_radius = 0
-                text_scale = 1.0
-                
-            # Phase 2: Impact and bounce (last 40% of slam)
-            else:
-                impact_progress = (slam_progress - 0.6) / 0.4
-                
-                # Bounce effect with dampening
-                bounce_cycles = 2  # Number of bounces
-                bounce_value = math.sin(impact_progress * bounce_cycles * math.pi)
-                bounce_height = self.drop_height * 0.3 * bounce_value * (1.0 - impact_progress)
-                
-                y_offset = -bounce_height * self.bounce_dampening
-                
-                # Shockwave expanding from impact
-                shockwave_radius = impact_progress * self.max_shockwave_radius
-                
-                # Text compression on impact
-                if impact_progress < 0.3:
-                    compression_factor = 1.0 - (impact_progress / 0.3) * 0.2  # Compress by 20%
-                    text_scale = compression_factor
-                else:
-                    text_scale = 0.8 + ((impact_progress - 0.3) / 0.7) * 0.2  # Restore to normal
-        else:
-            # Create repeating slam cycles for word-level effects
-            # Add a pause between slams and repeat the animation
-            slam_cycle_duration = slam_duration + 2.0  # 2 second pause between slams
-            cycle_time = frame_time % slam_cycle_duration
-            
-            if cycle_time < slam_duration:
-                # We're in a slam cycle, recalculate progress
-                slam_progress = cycle_time / max(0.1, slam_duration)
-                
-                # Phase 1: Drop (first 60% of slam)
-                if slam_progress < 0.6:
-                    drop_progress = slam_progress / 0.6
-                    
-                    # Accelerating drop (gravity effect)
-                    gravity_factor = drop_progress * drop_progress  # Quadratic acceleration
-                    y_offset = -self.drop_height * (1.0 - gravity_factor)
-                    
-                    # No shockwave during drop
-                    shockwave_radius = 0
-                    text_scale = 1.0
-                    
-                # Phase 2: Impact and bounce (last 40% of slam)
-                else:
-                    impact_progress = (slam_progress - 0.6) / 0.4
-                    
-                    # Bounce effect with dampening
-                    bounce_cycles = 2  # Number of bounces
-                    bounce_value = math.sin(impact_progress * bounce_cycles * math.pi)
-                    bounce_height = self.drop_height * 0.3 * bounce_value * (1.0 - impact_progress)
-                    
-                    y_offset = -bounce_height * self.bounce_dampening
-                    
-                    # Shockwave expanding from impact
-                    shockwave_radius = impact_progress * self.max_shockwave_radius
-                    
-                    # Text compression on impact
-                    if impact_progress < 0.3:
-                        compression_factor = 1.0 - (impact_progress / 0.3) * 0.2  # Compress by 20%
-                        text_scale = compression_factor
-                    else:
-                        text_scale = 0.8 + ((impact_progress - 0.3) / 0.7) * 0.2  # Restore to normal
-            else:
-                # Between slam cycles: text at rest
-                y_offset = 0
-                shockwave_radius = 0
-                text_scale = 1.0
+        if slam_progress is None:
+            # Between slam cycles: text at rest
+            return self._render_rest_canvas(frame_image.size, text, font, outline_width,
+                                            text_anchor_x, text_anchor_y, frame_width)
+        
+        y_offset, shockwave_radius, text_scale = self._phase(slam_progress)
+        
+        # Create blank canvas for text; only the frame size is needed, so the
+        # incoming frame is never converted or copied
+        blank_canvas = Image.new("RGBA", frame_image.size, 0)
+        draw = ImageDraw.Draw(blank_canvas)
         
         # Draw shockwave rings
         if shockwave_radius > 10:
@@ -326,27 +333,27 @@ class SlamEffect(EffectBase):
                     if ring_alpha > 0:
                         ring_color = (255, 200, 100, ring_alpha)  # Orange impact color
                         
-                        # Draw ring (ellipse outline)
+                        # Draw ring (ellipse outline) in one call; PIL grows the width inwards,
+                        # so pad the box to keep the ring extending outwards from ring_radius
                         ring_thickness = 2 + ring
-                        for t in range(ring_thickness):
-                            try:
-                                draw.ellipse([
-                                    text_anchor_x - ring_radius - t, text_anchor_y - ring_radius - t + y_offset,
-                                    text_anchor_x + ring_radius + t, text_anchor_y + ring_radius + t + y_offset
-                                ], outline=ring_color)
-                            except:
-                                pass  # Skip if drawing fails
+                        outer_radius = ring_radius + ring_thickness - 1
+                        draw.ellipse([
+                            text_anchor_x - outer_radius, text_anchor_y - outer_radius + y_offset,
+                            text_anchor_x + outer_radius, text_anchor_y + outer_radius + y_offset
+                        ], outline=ring_color, width=ring_thickness)
         
         # Calculate text position with slam offset
         slam_text_y = text_anchor_y + y_offset
         
         # Create scaled font for impact compression
-        if text_scale != 1.0:
+        # Scales within 2% of normal are imperceptible, so keep the original font for them
+        if abs(text_scale - 1.0) > 0.02:
             try:
                 current_font_size = font.size if hasattr(font, 'size') else 24
-                scaled_size = max(8, int(current_font_size * text_scale))
+                # Quantize to 2px steps so consecutive frames share cached fonts
+                scaled_size = max(8, int(current_font_size * text_scale) // 2 * 2)
                 if hasattr(font, 'path') and font.path:
-                    scaled_font = ImageFont.truetype(font.path, scaled_size)
+                    scaled_font = get_scaled_font(font.path, scaled_size)
                 else:
                     scaled_font = font
             except:
@@ -355,25 +362,19 @@ class SlamEffect(EffectBase):
             scaled_font = font
         
         # Enhanced coloring during impact
-        original_color = parse_color_to_pil_format(font_color)
         if shockwave_radius > 0:
             # Make text more intense/red during impact
-            if original_color.startswith('#'):
-                r = int(original_color[1:3], 16)
-                g = int(original_color[3:5], 16)
-                b = int(original_color[5:7], 16)
-            else:
-                r, g, b = 255, 255, 255
+            r, g, b = self._orig_rgb
             
             impact_factor = shockwave_radius / self.max_shockwave_radius
             impact_r = min(255, int(r + impact_factor * (255 - r)))
             impact_g = max(0, int(g * (1.0 - impact_factor * 0.3)))
             impact_b = max(0, int(b * (1.0 - impact_factor * 0.5)))
-            slam_color = f"#{impact_r:02x}{impact_g:02x}{impact_b:02x}"
+            slam_color = (impact_r, impact_g, impact_b)
             slam_outline = "#8B0000"  # Dark red outline during impact
         else:
-            slam_color = original_color
-            slam_outline = parse_color_to_pil_format(outline_color)
+            slam_color = self._font_pil
+            slam_outline = self._outline_pil
         
         # Draw the slamming text with multi-line support
         enhanced_outline_width = outline_width + (2 if shockwave_radius > 0 else 0)
@@ -392,35 +393,28 @@ class SlamEffect(EffectBase):
         
         # Add impact dust/debris particles
         if shockwave_radius > 30:
-            import random
             # Set seed for consistent particles based on time
             time_seed = int(frame_time * 100) // 2  # Change every 0.02 seconds
-            random.seed(hash(text) % 1000000 + time_seed)
+            rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")) + time_seed)
             
+            # Generate all particle properties in one batch
             num_particles = int(10 + (intensity / 100.0) * 20)
-            for i in range(num_particles):
-                # Particle position around impact point
-                angle = random.random() * 2 * math.pi
-                distance = random.random() * shockwave_radius * 0.8
-                
-                particle_x = text_anchor_x + math.cos(angle) * distance
-                particle_y = slam_text_y + math.sin(angle) * distance * 0.5  # Flatten vertically
-                
-                # Particle properties
-                particle_size = random.randint(1, 3)
-                particle_alpha = int(random.randint(100, 200) * (1.0 - shockwave_radius / self.max_shockwave_radius))
-                
+            angles = rng.random(num_particles) * 2 * np.pi
+            distances = rng.random(num_particles) * shockwave_radius * 0.8
+            sizes = rng.integers(1, 4, num_particles)
+            alphas = (rng.integers(100, 201, num_particles) * (1.0 - shockwave_radius / self.max_shockwave_radius)).astype(np.int32)
+            grays = rng.integers(80, 151, num_particles)  # Dust/debris color (brown/gray)
+            
+            # Particle positions around impact point, flattened vertically
+            xs = text_anchor_x + np.cos(angles) * distances
+            ys = slam_text_y + np.sin(angles) * distances * 0.5
+            
+            for particle_x, particle_y, particle_size, particle_alpha, gray_value in zip(
+                    xs.tolist(), ys.tolist(), sizes.tolist(), alphas.tolist(), grays.tolist()):
                 if particle_alpha > 0:
-                    # Dust/debris color (brown/gray)
-                    gray_value = random.randint(80, 150)
-                    particle_color = (gray_value, gray_value - 20, gray_value - 40, particle_alpha)
-                    
-                    try:
-                        draw.ellipse([
-                            particle_x - particle_size, particle_y - particle_size,
-                            particle_x + particle_size, particle_y + particle_size
-                        ], fill=particle_color)
-                    except:
-                        pass  # Skip if drawing fails
+                    draw.ellipse([
+                        particle_x - particle_size, particle_y - particle_size,
+                        particle_x + particle_size, particle_y + particle_size
+                    ], fill=(gray_value, gray_value - 20, gray_value - 40, particle_alpha))
         
         return blank_canvas
\ No newline at end of file
@@ -1,59 +1,83 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont
-import random
 import math
+import zlib
+import numpy as np
 
-def parse_color_to_pil_format(color_input):
+MAX_CACHED_LAYOUTS = 256
+MAX_CACHED_WORD_WIDTHS = 4096
+_wrap_cache = {}
+_word_width_cache = {}
+_line_height_cache = {}
+
+def get_text_width(text, font):
+    """Returns the cached advance width of text in font."""
+    key = (font, text)
+    width = _word_width_cache.get(key)
+    if width is None:
+        width = font.getlength(text)
+        if len(_word_width_cache) >= MAX_CACHED_WORD_WIDTHS:
+            # Evict the oldest entry
+            del _word_width_cache[next(iter(_word_width_cache))]
+        _word_width_cache[key] = width
+    return width
+
+def get_line_height(draw, font):
+    """Returns the cached line height of font, measured from the "Ay" probe string."""
+    line_height = _line_height_cache.get(font)
+    if line_height is None:
+        try:
+            bbox = draw.textbbox((0, 0), "Ay", font=font)
+            line_height = bbox[3] - bbox[1]
+        except AttributeError:
+            line_height = draw.textsize("Ay", font=font)[1]
+        if len(_line_height_cache) >= MAX_CACHED_LAYOUTS:
+            # Evict the oldest entry
+            del _line_height_cache[next(iter(_line_height_cache))]
+        _line_height_cache[font] = line_height
+    return line_height
+
+def wrap_text_lines(draw, text, font, max_width):
     """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
+    Word-wraps text to max_width and measures the line height.
+    Captions are redrawn with the same text and font every frame, so layouts are cached.
+    Returns (lines, line_height).
     """
-    if not color_input:
-        return "#FFFFFF"
-    
-    color_str = str(color_input).strip()
+    key = (font, text, max_width)
+    layout = _wrap_cache.get(key)
+    if layout is not None:
+        return layout
     
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Greedy wrap on a running width: each word is measured once (and cached across
+    # captions) instead of re-measuring the whole growing line for every word
+    space_width = get_text_width(' ', font)
+    lines = []
+    current_line = []
+    current_width = 0
     
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    for word in text.split(' '):
+        word_width = get_text_width(word, font)
+        if not current_line:
+            current_line.append(word)
+            current_width = word_width
+        elif current_width + space_width + word_width <= max_width:
+            current_line.append(word)
+            current_width += space_width + word_width
+        else:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+            current_width = word_width
     
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    if current_line:
+        lines.append(' '.join(current_line))
     
-    return color_str
+    layout = (tuple(lines), get_line_height(draw, font))
+    if len(_wrap_cache) >= MAX_CACHED_LAYOUTS:
+        # Evict the oldest entry
+        del _wrap_cache[next(iter(_wrap_cache))]
+    _wrap_cache[key] = layout
+    return layout
 
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
@@ -64,35 +88,7 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
     
     # Handle multi-line text if max_width is specified
     if max_width and len(text) > 0:
-        words = text.split(' ')
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            try:
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                line_width = bbox[2] - bbox[0]
-            except AttributeError:
-                # Fallback for older PIL versions
-                line_width = draw.textsize(test_line, font=font)[0]
-            
-            if line_width <= max_width or not current_line:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        # Calculate line height
-        try:
-            bbox = draw.textbbox((0, 0), "Ay", font=font)
-            line_height = bbox[3] - bbox[1]
-        except AttributeError:
-            line_height = draw.textsize("Ay", font=font)[1]
+        lines, line_height = wrap_text_lines(draw, text, font, max_width)
         
         # Calculate total text block height and adjust position
         total_height = len(lines) * line_height + (len(lines) - 1) * 4  # 4px line spacing
@@ -110,50 +106,120 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
             line_y = start_y + i * (line_height + 4)
             line_pos = (position[0], line_y)
             
-            try:
-                # Try modern PIL approach with stroke support
-                if outline_width > 0:
-                    draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t",
-                             stroke_width=outline_width, stroke_fill=pil_outline_color)
-                else:
-                    draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t")
-            except (TypeError, AttributeError):
-                # Fallback for older PIL versions
-                if outline_width > 0:
-                    for dx in range(-outline_width, outline_width + 1):
-                        for dy in range(-outline_width, outline_width + 1):
-                            if dx != 0 or dy != 0:
-                                outline_pos = (line_pos[0] + dx, line_pos[1] + dy)
-                                draw.text(outline_pos, line, font=font, fill=pil_outline_color, anchor=anchor[0]+"t")
+            if outline_width > 0:
+                draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t",
+                         stroke_width=outline_width, stroke_fill=pil_outline_color)
+            else:
                 draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t")
         
         return True
     
-    # Single line text (original logic)
-    try:
-        # Try modern PIL approach with stroke support
-        if hasattr(draw, "text") and hasattr(draw, "textbbox"):
-            # Test if stroke_width parameter is supported
-            draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
-                     stroke_width=outline_width, stroke_fill=pil_outline_color)
-            return True
-    except (TypeError, AttributeError):
-        pass
+    # Single line text; Pillow >= 10 always supports stroke_width/stroke_fill
+    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
+             stroke_width=outline_width, stroke_fill=pil_outline_color)
+    return True
+
+SPARKLE_BRIGHTNESS_LEVELS = 16  # Brightness steps each sparkle tile is pre-rendered at
+
+# Unit vectors for the star sparkle rays: four cardinal points plus shorter diagonals (8-pointed star)
+STAR_CARDINAL_DIRS = tuple((math.cos(math.radians(a)), math.sin(math.radians(a))) for a in (0, 90, 180, 270))
+STAR_DIAGONAL_DIRS = tuple((math.cos(math.radians(a)) * 0.7, math.sin(math.radians(a)) * 0.7) for a in (45, 135, 225, 315))
+SPARKLE_STYLES = ('star', 'dot', 'plus')
+MAX_CACHED_SPARKLE_LAYOUTS = 32
+_sparkle_tile_cache = {}
+_sparkle_layout_cache = {}
+
+def get_sparkle_tile(style, base_size, level):
+    """
+    Returns a cached (tile, mask) pair for a single sparkle centred in the tile,
+    drawn at the given quantized brightness level. The tile is opaque and in
+    premultiplied "RGBa" mode and the mask carries the sparkle's alpha, so
+    pasting with the mask onto an "RGBa" layer is an exact "over" composite.
+    """
+    key = (style, base_size, level)
+    cached = _sparkle_tile_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    brightness = level / (SPARKLE_BRIGHTNESS_LEVELS - 1)
+    half = base_size + 2
+    tile = Image.new("RGBA", (2 * half + 1, 2 * half + 1), 0)
+    draw = ImageDraw.Draw(tile)
+    x = y = half
     
-    # Fallback to manual outline drawing for older PIL versions
-    if outline_width > 0:
-        # Draw outline by drawing text multiple times with offsets
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:
-                    outline_pos = (position[0] + dx, position[1] + dy)
-                    draw.text(outline_pos, text, font=font, fill=pil_outline_color, anchor=anchor)
+    # Sparkle color (white to yellow gradient based on brightness)
+    r = 255
+    g = int(255 - (1 - brightness) * 50)  # Yellow tint when bright
+    b = int(255 - (1 - brightness) * 100)  # More yellow when bright
+    alpha = int(brightness * 255)
+    sparkle_color = (r, g, b, alpha)
     
-    # Draw main text
-    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor)
-    return True
+    size = base_size * brightness
+    
+    # Draw sparkle based on style
+    if style == 'star':
+        # Lines from center to each cardinal and diagonal point
+        for dx, dy in STAR_CARDINAL_DIRS + STAR_DIAGONAL_DIRS:
+            draw.line([x, y, x + dx * size, y + dy * size], fill=sparkle_color, width=1)
+        
+    elif style == 'dot':
+        # Simple circle
+        draw.ellipse([x - size/2, y - size/2, x + size/2, y + size/2], 
+                   fill=sparkle_color)
+        
+    else:  # 'plus'
+        # Plus sign
+        draw.line([x - size, y, x + size, y], fill=sparkle_color, width=2)
+        draw.line([x, y - size, x, y + size], fill=sparkle_color, width=2)
+    
+    mask = tile.getchannel("A")
+    tile.putalpha(255)
+    tile = tile.convert("RGBa")
+    _sparkle_tile_cache[key] = (tile, mask)
+    return tile, mask
+
+def get_sparkle_layout(seed, num_sparkles):
+    """
+    Returns the cached sparkle layout for a seed as parallel arrays
+    (x_offsets, y_offsets, phases, angular_freqs, sizes, styles).
+    prepare() runs on every frame, so layouts are generated once per caption.
+    """
+    key = (seed, num_sparkles)
+    layout = _sparkle_layout_cache.get(key)
+    if layout is not None:
+        return layout
+    
+    # Create sparkle particles, drawing each property for all sparkles in one batch
+    rng = np.random.default_rng(seed)
+    x_offsets = rng.integers(-100, 101, num_sparkles, dtype=np.int32)
+    y_offsets = rng.integers(-40, 41, num_sparkles, dtype=np.int32)
+    phases = rng.random(num_sparkles) * 2 * np.pi
+    frequencies = 0.5 + rng.random(num_sparkles) * 2.0  # 0.5-2.5 Hz
+    sizes = rng.integers(2, 7, num_sparkles)
+    styles = rng.integers(0, len(SPARKLE_STYLES), num_sparkles)
+    
+    # Parallel arrays so per-frame brightness is one vectorized evaluation
+    layout = (
+        x_offsets,
+        y_offsets,
+        phases,
+        frequencies * (2 * np.pi),  # Folded so brightness is one mul+add
+        tuple(sizes.tolist()),
+        tuple(SPARKLE_STYLES[i] for i in styles.tolist()),
+    )
+    if len(_sparkle_layout_cache) >= MAX_CACHED_SPARKLE_LAYOUTS:
+        # Evict the oldest entry
+        del _sparkle_layout_cache[next(iter(_sparkle_layout_cache))]
+    _sparkle_layout_cache[key] = layout
+    return layout
 
 class SparkleEffect(EffectBase):
+    def __init__(self):
+        # Per-caption state starts unprepared so transform needs no hasattr checks
+        self.last_caption_text = None
+        self._text_tile_key = None
+        self._text_tile = (None, None)
+
     @property
     def slug(self) -> str:
         return "sparkle"
@@ -178,26 +244,15 @@ class SparkleEffect(EffectBase):
             # Use a default seed if no text provided
             self.random_seed = 12345
         else:
-            self.random_seed = hash(text) % 1000000
+            self.random_seed = zlib.crc32(text.encode("utf-8"))  # Stable across interpreter runs, unlike hash()
         
-        # Create sparkle particles
-        rng = random.Random(self.random_seed)
         intensity = kwargs.get('intensity', self.default_intensity)
         
         # Number of sparkles based on intensity
         num_sparkles = int(5 + (intensity / 100.0) * 20)  # 5-25 sparkles
         
-        self.sparkles = []
-        for i in range(num_sparkles):
-            sparkle = {
-                'x_offset': rng.randint(-100, 100),
-                'y_offset': rng.randint(-40, 40),
-                'phase': rng.random() * 2 * math.pi,
-                'frequency': 0.5 + rng.random() * 2.0,  # 0.5-2.5 Hz
-                'size': rng.randint(2, 6),
-                'style': rng.choice(['star', 'dot', 'plus'])
-            }
-            self.sparkles.append(sparkle)
+        (self.sparkle_x_offsets, self.sparkle_y_offsets, self.sparkle_phases,
+         self.sparkle_angular_freqs, self.sparkle_sizes, self.sparkle_styles) = get_sparkle_layout(self.random_seed, num_sparkles)
 
     def transform(self, frame_image: Image.Image, text: str, base_position: tuple[int, int],
                   current_frame_index: int, intensity: int,
@@ -209,14 +264,19 @@ class SparkleEffect(EffectBase):
         """
         Adds magical sparkles around the text.
         """
-        if frame_image.mode != "RGBA":
-            frame_image = frame_image.convert("RGBA")
-        
-        # Create blank canvas since sparkle is now a text-drawing effect
-        blank_canvas = Image.new("RGBA", frame_image.size, (0, 0, 0, 0))
+        # Create blank canvas since sparkle is now a text-drawing effect; only the
+        # frame size is needed, so the incoming frame is never converted or copied
+        blank_canvas = Image.new("RGBA", frame_image.size, 0)
         
-        if not text or intensity == 0:
-            # No sparkles, just draw text normally with multi-line support
+        # Draw the text first with multi-line support. The text is the same on every
+        # frame of a caption, so it is rendered once and kept as a cropped tile
+        text_key = (blank_canvas.size, text, font, font_color, outline_color,
+                    outline_width, text_anchor_x, text_anchor_y, frame_width)
+        if self._text_tile_key == text_key:
+            tile, offset = self._text_tile
+            if tile is not None:
+                blank_canvas.paste(tile, offset)
+        else:
             draw_text_with_outline(
                 ImageDraw.Draw(blank_canvas), 
                 (text_anchor_x, text_anchor_y), 
@@ -228,85 +288,56 @@ class SparkleEffect(EffectBase):
                 anchor="mm",
                 max_width=int(frame_width * 0.9)
             )
+            bbox = blank_canvas.getbbox()
+            self._text_tile_key = text_key
+            self._text_tile = (blank_canvas.crop(bbox), bbox[:2]) if bbox else (None, None)
+        
+        if not text or intensity == 0:
+            # No sparkles, just the text
             return blank_canvas
         
         # Ensure sparkles are prepared for this text
-        if not hasattr(self, 'last_caption_text') or self.last_caption_text != text:
+        if self.last_caption_text != text:
             self.last_caption_text = text
             self.prepare(text=text, intensity=intensity)
         
-        # Draw the text first with multi-line support
-        draw_text_with_outline(
-            ImageDraw.Draw(blank_canvas), 
-            (text_anchor_x, text_anchor_y), 
-            text,
-            font, 
-            font_color, 
-            outline_color, 
-            outline_width, 
-            anchor="mm",
-            max_width=int(frame_width * 0.9)
-        )
-        
         # Get FPS for animation
         fps = kwargs.get('target_fps', 12)
         time = current_frame_index / fps
         
-        # Now draw sparkles on the canvas
-        draw = ImageDraw.Draw(blank_canvas)
+        # Calculate brightness (pulsing) for all sparkles at once, normalized to 0-1
+        brightness = (np.sin(self.sparkle_phases + time * self.sparkle_angular_freqs) + 1) / 2
         
-        for sparkle in self.sparkles:
-            # Calculate sparkle brightness (pulsing)
-            brightness = math.sin(sparkle['phase'] + time * sparkle['frequency'] * 2 * math.pi)
-            brightness = (brightness + 1) / 2  # Normalize to 0-1
-            
-            # Skip if too dim
-            if brightness < 0.3:
-                continue
-            
-            # Sparkle position
-            x = text_anchor_x + sparkle['x_offset']
-            y = text_anchor_y + sparkle['y_offset']
-            
-            # Sparkle color (white to yellow gradient based on brightness)
-            r = 255
-            g = int(255 - (1 - brightness) * 50)  # Yellow tint when bright
-            b = int(255 - (1 - brightness) * 100)  # More yellow when bright
-            alpha = int(brightness * 255)
-            sparkle_color = (r, g, b, alpha)
+        # Skip sparkles that are too dim
+        visible = np.flatnonzero(brightness >= 0.3)
+        levels = np.rint(brightness[visible] * (SPARKLE_BRIGHTNESS_LEVELS - 1)).astype(np.int32)
+        xs = text_anchor_x + self.sparkle_x_offsets[visible]
+        ys = text_anchor_y + self.sparkle_y_offsets[visible]
+        
+        # Collect the pre-rendered sparkle for each visible sparkle's brightness level
+        placements = []
+        for i, level, x, y in zip(visible.tolist(), levels.tolist(), xs.tolist(), ys.tolist()):
+            tile, mask = get_sparkle_tile(self.sparkle_styles[i], self.sparkle_sizes[i], level)
+            half = tile.width // 2
+            placements.append((tile, mask, int(x) - half, int(y) - half))
+        
+        if placements:
+            # Paste all sparkles into one premultiplied layer covering just their
+            # bounding box, then composite that layer onto the canvas in a single pass
+            left = min(dest_x for _, _, dest_x, _ in placements)
+            top = min(dest_y for _, _, _, dest_y in placements)
+            right = max(dest_x + tile.width for tile, _, dest_x, _ in placements)
+            bottom = max(dest_y + tile.height for tile, _, _, dest_y in placements)
             
-            size = sparkle['size'] * brightness
+            sparkle_layer = Image.new("RGBa", (right - left, bottom - top), 0)
+            for tile, mask, dest_x, dest_y in placements:
+                sparkle_layer.paste(tile, (dest_x - left, dest_y - top), mask)
+            sparkle_layer = sparkle_layer.convert("RGBA")
             
-            # Draw sparkle based on style
-            if sparkle['style'] == 'star':
-                # Four-pointed star
-                points = []
-                for angle in [0, 90, 180, 270]:
-                    rad = math.radians(angle)
-                    points.append((
-                        x + math.cos(rad) * size,
-                        y + math.sin(rad) * size
-                    ))
-                
-                # Draw lines from center to each point
-                for point in points:
-                    draw.line([x, y, point[0], point[1]], fill=sparkle_color, width=1)
-                
-                # Draw diagonal lines for 8-pointed star
-                for angle in [45, 135, 225, 315]:
-                    rad = math.radians(angle)
-                    end_x = x + math.cos(rad) * size * 0.7
-                    end_y = y + math.sin(rad) * size * 0.7
-                    draw.line([x, y, end_x, end_y], fill=sparkle_color, width=1)
-                
-            elif sparkle['style'] == 'dot':
-                # Simple circle
-                draw.ellipse([x - size/2, y - size/2, x + size/2, y + size/2], 
-                           fill=sparkle_color)
-                
-            else:  # 'plus'
-                # Plus sign
-                draw.line([x - size, y, x + size, y], fill=sparkle_color, width=2)
-                draw.line([x, y - size, x, y + size], fill=sparkle_color, width=2)
+            dest = (max(0, left), max(0, top))
+            source = (max(0, -left), max(0, -top))
+            if (source[0] < sparkle_layer.width and source[1] < sparkle_layer.height
+                    and dest[0] < blank_canvas.width and dest[1] < blank_canvas.height):
+                blank_canvas.alpha_composite(sparkle_layer, dest, source)
         
         return blank_canvas
\ No newline at end of file
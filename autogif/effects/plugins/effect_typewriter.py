@@ -1,59 +1,86 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont
+import bisect
 import math
 import random
+import zlib
 
-def parse_color_to_pil_format(color_input):
+MAX_CACHED_LAYOUTS = 256
+MAX_CACHED_WORD_WIDTHS = 4096
+MAX_CACHED_SCHEDULES = 64
+_wrap_cache = {}
+_word_width_cache = {}
+_line_height_cache = {}
+_schedule_cache = {}
+
+def get_text_width(text, font):
+    """Returns the cached advance width of text in font."""
+    key = (font, text)
+    width = _word_width_cache.get(key)
+    if width is None:
+        width = font.getlength(text)
+        if len(_word_width_cache) >= MAX_CACHED_WORD_WIDTHS:
+            # Evict the oldest entry
+            del _word_width_cache[next(iter(_word_width_cache))]
+        _word_width_cache[key] = width
+    return width
+
+def get_line_height(draw, font):
+    """Returns the cached line height of font, measured from the "Ay" probe string."""
+    line_height = _line_height_cache.get(font)
+    if line_height is None:
+        try:
+            bbox = draw.textbbox((0, 0), "Ay", font=font)
+            line_height = bbox[3] - bbox[1]
+        except AttributeError:
+            line_height = draw.textsize("Ay", font=font)[1]
+        if len(_line_height_cache) >= MAX_CACHED_LAYOUTS:
+            # Evict the oldest entry
+            del _line_height_cache[next(iter(_line_height_cache))]
+        _line_height_cache[font] = line_height
+    return line_height
+
+def wrap_text_lines(draw, text, font, max_width):
     """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
+    Word-wraps text to max_width and measures the line height.
+    Captions are redrawn with the same text and font every frame, so layouts are cached.
+    Returns (lines, line_height).
     """
-    if not color_input:
-        return "#FFFFFF"
-    
-    color_str = str(color_input).strip()
+    key = (font, text, max_width)
+    layout = _wrap_cache.get(key)
+    if layout is not None:
+        return layout
     
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Greedy wrap on a running width: each word is measured once (and cached across
+    # captions) instead of re-measuring the whole growing line for every word
+    space_width = get_text_width(' ', font)
+    lines = []
+    current_line = []
+    current_width = 0
     
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    for word in text.split(' '):
+        word_width = get_text_width(word, font)
+        if not current_line:
+            current_line.append(word)
+            current_width = word_width
+        elif current_width + space_width + word_width <= max_width:
+            current_line.append(word)
+            current_width += space_width + word_width
+        else:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+            current_width = word_width
     
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    if current_line:
+        lines.append(' '.join(current_line))
     
-    return color_str
+    layout = (tuple(lines), get_line_height(draw, font))
+    if len(_wrap_cache) >= MAX_CACHED_LAYOUTS:
+        # Evict the oldest entry
+        del _wrap_cache[next(iter(_wrap_cache))]
+    _wrap_cache[key] = layout
+    return layout
 
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
@@ -64,35 +91,7 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
     
     # Handle multi-line text if max_width is specified
     if max_width and len(text) > 0:
-        words = text.split(' ')
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            try:
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                line_width = bbox[2] - bbox[0]
-            except AttributeError:
-                # Fallback for older PIL versions
-                line_width = draw.textsize(test_line, font=font)[0]
-            
-            if line_width <= max_width or not current_line:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        # Calculate line height
-        try:
-            bbox = draw.textbbox((0, 0), "Ay", font=font)
-            line_height = bbox[3] - bbox[1]
-        except AttributeError:
-            line_height = draw.textsize("Ay", font=font)[1]
+        lines, line_height = wrap_text_lines(draw, text, font, max_width)
         
         # Calculate total text block height and adjust position
         total_height = len(lines) * line_height + (len(lines) - 1) * 4  # 4px line spacing
@@ -110,50 +109,84 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
             line_y = start_y + i * (line_height + 4)
             line_pos = (position[0], line_y)
             
-            try:
-                # Try modern PIL approach with stroke support
-                if outline_width > 0:
-                    draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t",
-                             stroke_width=outline_width, stroke_fill=pil_outline_color)
-                else:
-                    draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t")
-            except (TypeError, AttributeError):
-                # Fallback for older PIL versions
-                if outline_width > 0:
-                    for dx in range(-outline_width, outline_width + 1):
-                        for dy in range(-outline_width, outline_width + 1):
-                            if dx != 0 or dy != 0:
-                                outline_pos = (line_pos[0] + dx, line_pos[1] + dy)
-                                draw.text(outline_pos, line, font=font, fill=pil_outline_color, anchor=anchor[0]+"t")
+            if outline_width > 0:
+                draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t",
+                         stroke_width=outline_width, stroke_fill=pil_outline_color)
+            else:
                 draw.text(line_pos, line, font=font, fill=pil_font_color, anchor=anchor[0]+"t")
         
         return True
     
-    # Single line text (original logic)
-    try:
-        # Try modern PIL approach with stroke support
-        if hasattr(draw, "text") and hasattr(draw, "textbbox"):
-            # Test if stroke_width parameter is supported
-            draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
-                     stroke_width=outline_width, stroke_fill=pil_outline_color)
-            return True
-    except (TypeError, AttributeError):
-        pass
+    # Single line text; Pillow >= 10 always supports stroke_width/stroke_fill
+    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor,
+             stroke_width=outline_width, stroke_fill=pil_outline_color)
+    return True
+
+def get_character_frames(text, target_fps, intensity, caption_natural_duration_sec):
+    """
+    Returns the frame at which each character of text appears, with natural human rhythm.
+    prepare() runs on every frame, so schedules are cached per caption and timing inputs.
+    """
+    key = (text, target_fps, intensity, caption_natural_duration_sec)
+    character_frames = _schedule_cache.get(key)
+    if character_frames is not None:
+        return character_frames
+    
+    # Intensity controls typing speed: 0-100 maps to 2-8 characters per second
+    base_cps = 2.0 + (6.0 * (intensity / 100.0))
     
-    # Fallback to manual outline drawing for older PIL versions
-    if outline_width > 0:
-        # Draw outline by drawing text multiple times with offsets
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:
-                    outline_pos = (position[0] + dx, position[1] + dy)
-                    draw.text(outline_pos, text, font=font, fill=pil_outline_color, anchor=anchor)
+    # Basic typewriter delay between characters, hoisted out of the per-character loop
+    base_delay = 1.0 / base_cps
     
-    # Draw main text
-    draw.text(position, text, font=font, fill=pil_font_color, anchor=anchor)
-    return True
+    # Seeded per caption so the schedule is a pure function of its inputs
+    rand = random.Random(zlib.crc32(text.encode("utf-8"))).random
+    
+    # Calculate the frame when each character should appear
+    character_frames = []
+    current_time = 0.2  # Small initial delay
+    
+    for char in text:
+        # Convert current time to frame number
+        frame_num = int(current_time * target_fps)
+        character_frames.append(frame_num)
+        
+        # Add slight pause after punctuation
+        if char in '.,!?;:':
+            char_delay = base_delay + 0.3
+        elif char == ' ':
+            char_delay = base_delay + 0.1
+        else:
+            char_delay = base_delay
+        
+        # Add natural human variation (±20%); same draw as random.uniform(0.8, 1.2)
+        char_delay *= 0.8 + (1.2 - 0.8) * rand()
+        
+        current_time += char_delay
+    
+    # Scale timing to fit the caption duration if needed
+    if character_frames:
+        total_time_needed = current_time
+        max_time_available = caption_natural_duration_sec * 0.9
+        
+        if total_time_needed > max_time_available:
+            # Speed up to fit
+            time_scale = max_time_available / total_time_needed
+            character_frames = [int(frame * time_scale) for frame in character_frames]
+    
+    character_frames = tuple(character_frames)
+    if len(_schedule_cache) >= MAX_CACHED_SCHEDULES:
+        # Evict the oldest entry
+        del _schedule_cache[next(iter(_schedule_cache))]
+    _schedule_cache[key] = character_frames
+    return character_frames
 
 class TypewriterEffect(EffectBase):
+    def __init__(self):
+        # Timing and render state start unprepared so transform needs no hasattr checks
+        self.character_frames = ()
+        self._last_render_key = None
+        self._last_render_tile = (None, None)
+
     @property
     def slug(self) -> str:
         return "typewriter"
@@ -178,46 +211,12 @@ class TypewriterEffect(EffectBase):
             intensity = kwargs.get('intensity', self.default_intensity)
         
         if text_length <= 0 or caption_natural_duration_sec <= 0:
-            self.character_frames = []
+            self.character_frames = ()
             return
         
         text = kwargs.get('text', 'x' * text_length)
         
-        # Intensity controls typing speed: 0-100 maps to 2-8 characters per second
-        base_cps = 2.0 + (6.0 * (intensity / 100.0))
-        
-        # Calculate the frame when each character should appear
-        self.character_frames = []
-        current_time = 0.2  # Small initial delay
-        
-        for i, char in enumerate(text):
-            # Convert current time to frame number
-            frame_num = int(current_time * target_fps)
-            self.character_frames.append(frame_num)
-            
-            # Calculate delay to next character (basic typewriter timing)
-            char_delay = 1.0 / base_cps
-            
-            # Add slight pause after punctuation
-            if char in '.,!?;:':
-                char_delay += 0.3
-            elif char == ' ':
-                char_delay += 0.1
-            
-            # Add natural human variation (±20%)
-            char_delay *= random.uniform(0.8, 1.2)
-            
-            current_time += char_delay
-        
-        # Scale timing to fit the caption duration if needed
-        if self.character_frames:
-            total_time_needed = current_time
-            max_time_available = caption_natural_duration_sec * 0.9
-            
-            if total_time_needed > max_time_available:
-                # Speed up to fit
-                time_scale = max_time_available / total_time_needed
-                self.character_frames = [int(frame * time_scale) for frame in self.character_frames]
+        self.character_frames = get_character_frames(text, target_fps, intensity, caption_natural_duration_sec)
 
     def transform(self, frame_image: Image.Image, text: str, base_position: tuple[int, int],
                   current_frame_index: int, intensity: int, 
@@ -227,27 +226,20 @@ class TypewriterEffect(EffectBase):
                   frame_width: int, frame_height: int,
                   **kwargs) -> Image.Image:
         
-        # Ensure frame is RGBA mode
-        if frame_image.mode != "RGBA":
-            frame_image = frame_image.convert("RGBA")
-        
-        # Create a new blank canvas
-        blank_canvas = Image.new("RGBA", frame_image.size, (0, 0, 0, 0))
+        # Create a new blank canvas; only the frame size is needed, so the
+        # incoming frame is never converted or copied
+        blank_canvas = Image.new("RGBA", frame_image.size, 0)
         
         if not text:
             return blank_canvas
         
         # Ensure prepare was called and we have character frames
-        if not hasattr(self, 'character_frames') or not self.character_frames:
+        if not self.character_frames:
             self.prepare(12, 2.0, len(text), intensity, text=text)
         
-        # Determine how many characters to show by checking frame timings
-        num_chars_to_show = 0
-        for i, target_frame in enumerate(self.character_frames):
-            if current_frame_index >= target_frame:
-                num_chars_to_show = i + 1
-            else:
-                break
+        # Determine how many characters to show: the number of characters whose frame has been reached
+        # (frames are non-decreasing, so this is a binary search)
+        num_chars_to_show = bisect.bisect_right(self.character_frames, current_frame_index)
         
         # Ensure we don't exceed text length
         num_chars_to_show = min(num_chars_to_show, len(text))
@@ -265,6 +257,16 @@ class TypewriterEffect(EffectBase):
         
         if not displayed_text:
             return blank_canvas
+        
+        # Typing is slower than the frame rate, so consecutive frames often show the same
+        # text; the last rendering is kept as a cropped tile and pasted when it repeats
+        render_key = (blank_canvas.size, displayed_text, font, font_color, outline_color,
+                      outline_width, text_anchor_x, text_anchor_y, frame_width)
+        if self._last_render_key == render_key:
+            tile, offset = self._last_render_tile
+            if tile is not None:
+                blank_canvas.paste(tile, offset)
+            return blank_canvas
 
         # Draw the text with multi-line support using the helper function
         draw_text_with_outline(
@@ -278,5 +280,9 @@ class TypewriterEffect(EffectBase):
             anchor="mm",
             max_width=int(frame_width * 0.9)
         )
+        
+        bbox = blank_canvas.getbbox()
+        self._last_render_key = render_key
+        self._last_render_tile = (blank_canvas.crop(bbox), bbox[:2]) if bbox else (None, None)
             
         return blank_canvas
\ No newline at end of file
@@ -1,60 +1,199 @@
 from autogif.effects.effect_base import EffectBase
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from autogif.effects._colors import parse_color_to_pil_format
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageFilter
 import math
 import random
+import numpy as np
 from datetime import datetime, timedelta
 
-def parse_color_to_pil_format(color_input):
+MAX_CACHED_OVERLAYS = 16
+MAX_CACHED_TIMECODES = 512
+_shade_cache = {}
+_timecode_cache = {}
+_default_font = None
+
+# Final VHS grade as one RGB -> RGB matrix: desaturate by blending 10% of the luma
+# (ITU-R 601, as ImageEnhance.Color uses) back in, then warm the channels with
+# per-channel gains (boost red/yellow slightly, reduce blue)
+COLOR_GRADE_SATURATION = 0.9
+COLOR_GRADE_GAINS = (1.03, 1.01, 0.97)
+
+def build_color_grade_matrix(saturation, gains):
+    """Returns the 12-tuple Image.convert matrix for a desaturate-then-tint grade."""
+    luma = (0.299, 0.587, 0.114)
+    matrix = []
+    for channel, gain in enumerate(gains):
+        row = [gain * (1 - saturation) * weight for weight in luma]
+        row[channel] += gain * saturation
+        matrix.extend(row + [0])
+    return tuple(matrix)
+
+COLOR_GRADE_MATRIX = build_color_grade_matrix(COLOR_GRADE_SATURATION, COLOR_GRADE_GAINS)
+
+def get_default_font():
+    """Returns PIL's default font, loaded once."""
+    global _default_font
+    if _default_font is None:
+        _default_font = ImageFont.load_default()
+    return _default_font
+
+def merge_overlapping_boxes(boxes, width, height):
+    """
+    Clips (left, top, right, bottom) boxes to the frame and merges any that overlap
+    into their bounding box, so every pixel is covered by at most one returned box.
     """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
+    merged = []
+    for box in boxes:
+        left, top = max(0, box[0]), max(0, box[1])
+        right, bottom = min(width, box[2]), min(height, box[3])
+        if left >= right or top >= bottom:
+            continue
+        
+        # Absorb every box this one overlaps, repeating until the result is disjoint
+        overlapping = True
+        while overlapping:
+            overlapping = False
+            for other in merged:
+                if left < other[2] and other[0] < right and top < other[3] and other[1] < bottom:
+                    merged.remove(other)
+                    left, top = min(left, other[0]), min(top, other[1])
+                    right, bottom = max(right, other[2]), max(bottom, other[3])
+                    overlapping = True
+                    break
+        merged.append((left, top, right, bottom))
+    return merged
+
+def get_vignette_alpha(width, height, distortion):
     """
-    if not color_input:
-        return "#FFFFFF"
+    Returns the (height, width) uint8 alpha of the black vignette used to simulate CRT
+    barrel distortion. Darkness grows with distance from the centre and is evaluated on
+    a 2x2 pixel grid.
+    """
+    center_x, center_y = width // 2, height // 2
+    max_distance = math.sqrt(center_x**2 + center_y**2)
     
-    color_str = str(color_input).strip()
+    # Radial distance of the top-left pixel of every 2x2 block
+    ys = np.arange(0, height, 2)[:, None]
+    xs = np.arange(0, width, 2)[None, :]
+    distance = np.sqrt((xs - center_x)**2 + (ys - center_y)**2)
     
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
+    # Stronger effect at edges
+    edge_factor = (distance / max_distance) ** 1.5  # More pronounced curve
+    darkness = (255 * distortion * edge_factor * 0.8).astype(np.uint8)
     
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Expand each block value to its 2x2 pixels
+    return darkness.repeat(2, axis=0).repeat(2, axis=1)[:height, :width]
+
+def get_scanline_alpha(width, height, intensity):
+    """
+    Returns the (height, width) uint8 alpha of the black CRT scan lines (plus vertical
+    phosphor lines at higher intensity). Every row and column is uniform, so the mask
+    is broadcast from one alpha value per row and overwritten on the phosphor columns.
+    """
+    # Create scan lines - every 2-3 pixels
+    scanline_spacing = 2 if intensity > 0.7 else 3
+    # FIXED: Increased scanline opacity significantly
+    scanline_opacity = int(255 * intensity * 0.8)  # Was 0.3, now 0.8 for much more visible lines
     
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Alternate between darker and lighter lines for realism
+    row_alpha = np.zeros(height, dtype=np.uint8)
+    row_alpha[::scanline_spacing * 2] = scanline_opacity
+    row_alpha[scanline_spacing::scanline_spacing * 2] = int(scanline_opacity * 0.7)
+    alpha = np.repeat(row_alpha[:, None], width, axis=1)
     
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    # Apply subtle vertical phosphor effect (more visible)
+    if intensity > 0.5:  # Lowered threshold
+        alpha[:, ::3] = int(scanline_opacity * 0.4)  # Increased from 0.2
     
-    return color_str
+    return alpha
+
+def get_crt_shade(width, height, distortion, scanline_intensity):
+    """
+    Returns the cached RGB multiply mask combining the vignette and scan line overlays.
+    Both overlays are black, so compositing them over an opaque frame only scales each
+    pixel by (255 - alpha) / 255; folding the two factors together lets the frame be
+    darkened with a single ImageChops.multiply instead of two RGBA alpha composites.
+    """
+    key = (width, height, distortion, scanline_intensity)
+    shade = _shade_cache.get(key)
+    if shade is not None:
+        return shade
+    
+    transmit = np.full((height, width), 255.0)
+    if distortion > 0:
+        transmit *= (255 - get_vignette_alpha(width, height, distortion).astype(np.float64)) / 255
+    if scanline_intensity > 0:
+        transmit *= (255 - get_scanline_alpha(width, height, scanline_intensity).astype(np.float64)) / 255
+    
+    shade = Image.fromarray(np.rint(transmit).astype(np.uint8), "L").convert("RGB")
+    if len(_shade_cache) >= MAX_CACHED_OVERLAYS:
+        # Evict the oldest entry
+        del _shade_cache[next(iter(_shade_cache))]
+    _shade_cache[key] = shade
+    return shade
+
+def get_timecode_sprite(timecode, fake_date, frame_width, frame_height):
+    """
+    Returns the cached (sprite, (left, top)) for the VHS timecode box: a background
+    box with the timecode and date drawn on it, and where its top-left sits in the frame.
+    """
+    key = (timecode, fake_date, frame_width, frame_height)
+    cached = _timecode_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # FIXED: Better font handling and sizing
+    font_size = max(16, frame_height // 30)  # Larger font size
+    font = get_default_font()
+    
+    # FIXED: Better positioning - top right instead of bottom
+    margin = 15
+    text_width = len(timecode) * (font_size // 2)  # Estimate text width
+    x = frame_width - text_width - margin
+    y = margin  # Top of screen instead of bottom
+    
+    # Draw more prominent background box for readability
+    box_padding = 8  # Increased padding
+    
+    # Calculate text bounds more accurately
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    try:
+        text_bbox = measure.textbbox((x, y), timecode, font=font)
+        date_bbox = measure.textbbox((x, y + 20), fake_date, font=font)
+    except:
+        # Fallback for older PIL versions
+        text_width_est = len(timecode) * 8
+        text_height_est = 16
+        text_bbox = (x, y, x + text_width_est, y + text_height_est)
+        date_bbox = (x, y + 20, x + len(fake_date) * 8, y + 36)
+    
+    full_bbox = (
+        min(text_bbox[0], date_bbox[0]) - box_padding,
+        text_bbox[1] - box_padding,
+        max(text_bbox[2], date_bbox[2]) + box_padding,
+        date_bbox[3] + box_padding
+    )
+    
+    # Draw into a sprite covering just the box (rectangle corners are inclusive)
+    left, top = full_bbox[0], full_bbox[1]
+    sprite = Image.new("RGBA", (full_bbox[2] - left + 1, full_bbox[3] - top + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sprite)
+    sprite_bbox = (0, 0, full_bbox[2] - left, full_bbox[3] - top)
+    
+    # More prominent background
+    draw.rectangle(sprite_bbox, fill=(0, 0, 0, 220))  # Darker background
+    draw.rectangle(sprite_bbox, outline=(80, 80, 80, 255), width=1)  # Border
+    
+    # Draw timecode text with better colors
+    draw.text((x - left, y - top), timecode, fill=(255, 255, 0, 255), font=font)  # Bright yellow
+    draw.text((x - left, y + 20 - top), fake_date, fill=(255, 255, 255, 255), font=font)  # White
+    
+    cached = (sprite, (left, top))
+    if len(_timecode_cache) >= MAX_CACHED_TIMECODES:
+        # Evict the oldest entry
+        del _timecode_cache[next(iter(_timecode_cache))]
+    _timecode_cache[key] = cached
+    return cached
 
 class VHSCRTEffect(EffectBase):
     @property
@@ -105,35 +244,14 @@ class VHSCRTEffect(EffectBase):
                 })
             self.static_patterns.append(pattern)
 
-    def _apply_scanlines(self, image: Image.Image, intensity: float) -> Image.Image:
-        """Apply CRT-style horizontal scan lines"""
-        if intensity <= 0:
+    def _apply_crt_shading(self, image: Image.Image, distortion: float, scanline_intensity: float) -> Image.Image:
+        """Apply the CRT vignette (barrel distortion) and scan lines as one darkening pass"""
+        if distortion <= 0 and scanline_intensity <= 0:
             return image
         
-        width, height = image.size
-        scanline_overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(scanline_overlay)
-        
-        # Create scan lines - every 2-3 pixels
-        scanline_spacing = 2 if intensity > 0.7 else 3
-        # FIXED: Increased scanline opacity significantly
-        scanline_opacity = int(255 * intensity * 0.8)  # Was 0.3, now 0.8 for much more visible lines
-        
-        for y in range(0, height, scanline_spacing):
-            # Alternate between darker and lighter lines for realism
-            if y % (scanline_spacing * 2) == 0:
-                opacity = scanline_opacity
-            else:
-                opacity = int(scanline_opacity * 0.7)
-            
-            draw.line([0, y, width, y], fill=(0, 0, 0, opacity))
-        
-        # Apply subtle vertical phosphor effect (more visible)
-        if intensity > 0.5:  # Lowered threshold
-            for x in range(0, width, 3):
-                draw.line([x, 0, x, height], fill=(0, 0, 0, int(scanline_opacity * 0.4)))  # Increased from 0.2
-        
-        return Image.alpha_composite(image.convert("RGBA"), scanline_overlay)
+        shade = get_crt_shade(image.width, image.height, distortion, scanline_intensity)
+        
+        return ImageChops.multiply(image, shade)
 
     def _apply_chromatic_aberration(self, image: Image.Image, offset: float, frame_index: int) -> Image.Image:
         """Apply RGB channel separation for VHS-style chromatic aberration"""
@@ -177,54 +295,21 @@ class VHSCRTEffect(EffectBase):
         
         return result
 
-    def _apply_barrel_distortion(self, image: Image.Image, distortion: float) -> Image.Image:
-        """
-        Simulate CRT barrel distortion with stronger vignette effect
-        """
-        if distortion <= 0:
-            return image
-        
-        width, height = image.size
-        
-        # Create stronger vignette effect to simulate CRT curvature
-        vignette = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(vignette)
-        
-        center_x, center_y = width // 2, height // 2
-        max_distance = math.sqrt(center_x**2 + center_y**2)
-        
-        # Create more pronounced radial gradient for vignette
-        for y in range(0, height, 2):  # Skip every other row for performance
-            for x in range(0, width, 2):  # Skip every other column
-                distance = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                # Stronger effect at edges
-                edge_factor = (distance / max_distance) ** 1.5  # More pronounced curve
-                darkness = int(255 * distortion * edge_factor * 0.8)  # Increased from 0.4
-                if darkness > 0:
-                    # Draw 2x2 blocks for efficiency
-                    draw.rectangle([x, y, x+1, y+1], fill=(0, 0, 0, darkness))
-        
-        # Apply vignette
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
-        result = Image.alpha_composite(image, vignette)
-        
-        return result
-
     def _add_vhs_noise(self, image: Image.Image, noise_level: float, frame_index: int) -> Image.Image:
-        """Add VHS-style noise and static"""
+        """Add VHS-style noise and static, drawing onto the RGB image in place"""
         if noise_level <= 0:
             return image
         
         width, height = image.size
-        noise_overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(noise_overlay)
         
         # Use frame index to cycle through static patterns
         pattern_index = frame_index % len(self.static_patterns)
         current_pattern = self.static_patterns[pattern_index]
         
-        # More aggressive noise
+        # More aggressive noise; rectangles are collected first so nothing is allocated
+        # on frames where none of the random gates fire
+        noise_rects = []
+        noise_boxes = []
         for static_point in current_pattern:
             if random.random() < noise_level * 2.0:  # Increased probability
                 x = int(static_point['x'] * width)
@@ -240,19 +325,34 @@ class VHSCRTEffect(EffectBase):
                 
                 # Draw noise as larger rectangles for VHS look
                 size = random.randint(1, 4)  # Increased size
-                draw.rectangle([x, y, x + size, y + size], fill=noise_color)
+                noise_rects.append(([x, y, x + size, y + size], noise_color))
+                noise_boxes.append((x, y, x + size + 1, y + size + 1))
         
         # More frequent horizontal lines (VHS tracking issues)
         if random.random() < noise_level * 0.8:  # Increased from 0.3
             y = random.randint(0, height)
             thickness = random.randint(1, 4)  # Thicker lines
             opacity = int(255 * noise_level)  # Increased opacity
-            draw.rectangle([0, y, width, y + thickness], fill=(255, 255, 255, opacity))
+            noise_rects.append(([0, y, width, y + thickness], (255, 255, 255, opacity)))
+            noise_boxes.append((0, y, width, y + thickness + 1))
+        
+        if not noise_rects:
+            return image
         
-        return Image.alpha_composite(image.convert("RGBA"), noise_overlay)
+        noise_overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(noise_overlay)
+        for rect, fill in noise_rects:
+            draw.rectangle(rect, fill=fill)
+        
+        # The overlay is transparent outside the drawn boxes, so only those regions
+        # are blended (using their alpha as the mask) instead of the whole frame
+        for box in merge_overlapping_boxes(noise_boxes, width, height):
+            region = noise_overlay.crop(box)
+            image.paste(region, box, region)
+        return image
 
     def _add_timecode(self, image: Image.Image, frame_index: int) -> Image.Image:
-        """Add retro VHS-style timecode overlay"""
+        """Add retro VHS-style timecode overlay, drawing onto the RGB image in place"""
         if not self.show_timecode:
             return image
         
@@ -268,54 +368,13 @@ class VHSCRTEffect(EffectBase):
         # Add fake date/time
         fake_date = "12/25/1987"  # Retro date
         
-        # Create overlay
-        overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # FIXED: Better font handling and sizing
-        try:
-            font_size = max(16, image.height // 30)  # Larger font size
-            # Try to use a more authentic monospace font
-            font = ImageFont.load_default()
-        except:
-            font = ImageFont.load_default()
-        
-        # FIXED: Better positioning - top right instead of bottom
-        margin = 15
-        text_width = len(timecode) * (font_size // 2)  # Estimate text width
-        x = image.width - text_width - margin
-        y = margin  # Top of screen instead of bottom
-        
-        # Draw more prominent background box for readability
-        box_padding = 8  # Increased padding
-        
-        # Calculate text bounds more accurately
-        try:
-            text_bbox = draw.textbbox((x, y), timecode, font=font)
-            date_bbox = draw.textbbox((x, y + 20), fake_date, font=font)
-        except:
-            # Fallback for older PIL versions
-            text_width_est = len(timecode) * 8
-            text_height_est = 16
-            text_bbox = (x, y, x + text_width_est, y + text_height_est)
-            date_bbox = (x, y + 20, x + len(fake_date) * 8, y + 36)
-        
-        full_bbox = (
-            min(text_bbox[0], date_bbox[0]) - box_padding,
-            text_bbox[1] - box_padding,
-            max(text_bbox[2], date_bbox[2]) + box_padding,
-            date_bbox[3] + box_padding
-        )
-        
-        # More prominent background
-        draw.rectangle(full_bbox, fill=(0, 0, 0, 220))  # Darker background
-        draw.rectangle(full_bbox, outline=(80, 80, 80, 255), width=1)  # Border
-        
-        # Draw timecode text with better colors
-        draw.text((x, y), timecode, fill=(255, 255, 0, 255), font=font)  # Bright yellow
-        draw.text((x, y + 20), fake_date, fill=(255, 255, 255, 255), font=font)  # White
-        
-        return Image.alpha_composite(image.convert("RGBA"), overlay)
+        # The box and text only change when the timecode does, so the drawn box is
+        # cached as a sprite and composited onto just its own region of the frame
+        sprite, (left, top) = get_timecode_sprite(timecode, fake_date, image.width, image.height)
+        
+        # paste clips the sprite to the frame itself
+        image.paste(sprite, (left, top), sprite)
+        return image
 
     def transform(self, frame_image: Image.Image, text: str, base_position: tuple[int, int],
                   current_frame_index: int, intensity: int,
@@ -332,47 +391,35 @@ class VHSCRTEffect(EffectBase):
         if not hasattr(self, 'scanline_intensity'):
             self.prepare(12, 2.0, len(text or ""), intensity)
         
-        # Work with the input frame (which may already have text/effects applied)
-        result = frame_image.copy()
-        
+        # The input frame (which may already have text/effects applied) is returned as is
+        # when there is nothing to do; the caller replaces its frame with the result
         if intensity == 0:
-            return result
+            return frame_image
         
-        # Apply effects in realistic order (how VHS/CRT would degrade signal)
+        # Apply effects in realistic order (how VHS/CRT would degrade signal). Every step
+        # keeps the frame RGB, so it is never expanded to RGBA
         
-        # 1. Chromatic aberration (signal degradation)
+        # 1. Chromatic aberration (signal degradation), which builds a new frame
         if self.chromatic_aberration > 0.5:  # Only apply if significant
-            result = self._apply_chromatic_aberration(result, self.chromatic_aberration, current_frame_index)
+            result = self._apply_chromatic_aberration(frame_image, self.chromatic_aberration, current_frame_index)
+        else:
+            # Noise and the timecode draw in place, so they need a frame of their own
+            result = frame_image.convert("RGB")
         
         # 2. VHS noise and static (early in pipeline so scanlines go over it)
         result = self._add_vhs_noise(result, self.noise_level, current_frame_index)
         
-        # 3. Barrel distortion (CRT screen curvature)
-        if self.barrel_distortion > 0.01:  # Only apply if significant
-            result = self._apply_barrel_distortion(result, self.barrel_distortion)
-        
-        # 4. Scan lines (CRT display characteristic) - Applied last so they're most visible
-        result = self._apply_scanlines(result, self.scanline_intensity)
+        # 3. Barrel distortion (CRT screen curvature) and 4. scan lines (CRT display
+        # characteristic), applied together after the noise so they're most visible
+        distortion = self.barrel_distortion if self.barrel_distortion > 0.01 else 0  # Only apply if significant
+        result = self._apply_crt_shading(result, distortion, self.scanline_intensity)
         
         # 5. Timecode overlay (VHS recording feature)
         result = self._add_timecode(result, current_frame_index)
         
         # 6. Final color adjustment for VHS look
         if intensity > 30:
-            # Convert to RGB for color enhancement
-            if result.mode == "RGBA":
-                result = result.convert("RGB")
-            
-            # Slightly desaturate and add warmth
-            enhancer = ImageEnhance.Color(result)
-            result = enhancer.enhance(0.9)  # Reduce saturation slightly
-            
-            # Add slight sepia/warm tint
-            r, g, b = result.split()
-            # Boost red/yellow slightly, reduce blue
-            r = ImageEnhance.Brightness(r).enhance(1.03)
-            g = ImageEnhance.Brightness(g).enhance(1.01)
-            b = ImageEnhance.Brightness(b).enhance(0.97)
-            result = Image.merge("RGB", (r, g, b))
+            # Slightly desaturate and add a warm tint in a single pass
+            result = result.convert("RGB", COLOR_GRADE_MATRIX)
         
         return result
\ No newline at end of file
@@ -1,58 +1,39 @@
 from autogif.effects.effect_base import EffectBase
+from autogif.effects._colors import parse_color_to_pil_format
 from PIL import Image, ImageDraw, ImageFont
 import math
 
-def parse_color_to_pil_format(color_input):
+MAX_CACHED_LAYOUTS = 256
+MAX_CACHED_GLYPHS = 1024
+_layout_cache = {}
+_glyph_cache = {}
+
+# ImageDraw.text hands fractional positions to FreeType in 1/64 pixel units and the glyph
+# then lands on a whole pixel, moving down only once the fraction reaches 32.5/64; adding
+# this before flooring snaps a cached glyph to the same row
+GLYPH_SNAP = 1 - 32.5 / 64
+
+def get_glyph_sprite(font, char, stroke_width, font_color, outline_color):
     """
-    Converts various color formats to PIL-compatible format.
-    Handles hex, rgb(), rgba(), and CSS color names.
-    Returns hex string or RGB tuple.
+    Returns the cached (sprite, (dx, dy)) for a character drawn with anchor "lt" at the
+    origin: the outlined glyph in its colors, and its top-left relative to the anchor.
     """
-    if not color_input:
-        return "#FFFFFF"
-    
-    color_str = str(color_input).strip()
-    
-    if color_str.startswith('#') and len(color_str) in [4, 7]:
-        return color_str
-    
-    if color_str.startswith('rgba(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[5:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    key = (font, char, stroke_width, font_color, outline_color)
+    cached = _glyph_cache.get(key)
+    if cached is not None:
+        return cached
     
-    if color_str.startswith('rgb(') and color_str.endswith(')'):
-        try:
-            values_str = color_str[4:-1]
-            values = [float(v.strip()) for v in values_str.split(',')]
-            if len(values) >= 3:
-                r, g, b = int(values[0]), int(values[1]), int(values[2])
-                r = max(0, min(255, r))
-                g = max(0, min(255, g))
-                b = max(0, min(255, b))
-                return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
+    left, top, right, bottom = font.getbbox(char, anchor="lt", stroke_width=stroke_width)
+    sprite = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(sprite).text((-left, -top), char, font=font, fill=font_color, anchor="lt",
+                                stroke_width=stroke_width, stroke_fill=outline_color)
     
-    if isinstance(color_input, (tuple, list)) and len(color_input) >= 3:
-        try:
-            r, g, b = int(color_input[0]), int(color_input[1]), int(color_input[2])
-            r = max(0, min(255, r))
-            g = max(0, min(255, g))
-            b = max(0, min(255, b))
-            return f"#{r:02x}{g:02x}{b:02x}"
-        except (ValueError, IndexError):
-            pass
-    
-    return color_str
+    cached = (sprite, (left, top))
+    if len(_glyph_cache) >= MAX_CACHED_GLYPHS:
+        # Evict the oldest entry
+        del _glyph_cache[next(iter(_glyph_cache))]
+    _glyph_cache[key] = cached
+    return cached
 
 def draw_text_with_outline(draw, position, text, font, font_color, outline_color, outline_width, anchor="mm", max_width=None):
     """Helper function to draw text with outline, handling different PIL versions, color formats, and multi-line text"""
@@ -153,6 +134,11 @@ def draw_text_with_outline(draw, position, text, font, font_color, outline_color
     return True
 
 class WaveEffect(EffectBase):
+    def __init__(self):
+        # The unanimated text is kept as a cropped tile between frames
+        self._static_text_key = None
+        self._static_text_tile = (None, None)
+
     @property
     def slug(self) -> str:
         return "wave"
@@ -204,6 +190,63 @@ class WaveEffect(EffectBase):
         
         return lines
 
+    def _get_layout(self, text: str, font: ImageFont.FreeTypeFont, max_width: int):
+        """
+        Returns the cached (line_height, lines) layout for text, where each line is
+        (line, line_width, glyphs) and glyphs lists (char, x offset from the line start)
+        for every non-space character. Measuring is the costly part of this effect,
+        so it is done once per caption instead of once per character per frame.
+        """
+        key = (font, text, max_width)
+        layout = _layout_cache.get(key)
+        if layout is not None:
+            return layout
+        
+        # Create a temporary draw object for measuring text
+        draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        
+        # Calculate line height
+        try:
+            bbox = draw.textbbox((0, 0), "Ay", font=font)
+            line_height = bbox[3] - bbox[1]
+        except AttributeError:
+            line_height = draw.textsize("Ay", font=font)[1]
+        
+        line_layouts = []
+        for line in self._split_text_into_lines(text, font, max_width):
+            # Get line width to center it
+            try:
+                bbox = draw.textbbox((0, 0), line, font=font)
+                line_width = bbox[2] - bbox[0]
+            except AttributeError:
+                line_width = draw.textsize(line, font=font)[0]
+            
+            glyphs = []
+            current_x = 0
+            for char in line:
+                # Get character width for proper spacing; spaces only advance the position
+                try:
+                    bbox = draw.textbbox((0, 0), char, font=font)
+                    char_width = bbox[2] - bbox[0]
+                except AttributeError:
+                    try:
+                        char_width = draw.textsize(char, font=font)[0]
+                    except:
+                        char_width = 10  # Fallback width
+                
+                if char != ' ':
+                    glyphs.append((char, current_x))
+                current_x += char_width
+            
+            line_layouts.append((line, line_width, tuple(glyphs)))
+        
+        layout = (line_height, tuple(line_layouts))
+        if len(_layout_cache) >= MAX_CACHED_LAYOUTS:
+            # Evict the oldest entry
+            del _layout_cache[next(iter(_layout_cache))]
+        _layout_cache[key] = layout
+        return layout
+
     def transform(self, frame_image: Image.Image, text: str, base_position: tuple[int, int],
                   current_frame_index: int, intensity: int,
                   font: ImageFont.FreeTypeFont, font_color: str, 
@@ -225,7 +268,16 @@ class WaveEffect(EffectBase):
         blank_canvas = Image.new("RGBA", frame_image.size, (0, 0, 0, 0))
         
         if not text or intensity == 0:
-            # No wave effect, draw normally with multi-line support
+            # No wave effect, draw normally with multi-line support. Nothing moves, so
+            # the text is rendered once and kept as a cropped tile
+            text_key = (blank_canvas.size, text, font, font_color, outline_color,
+                        outline_width, text_anchor_x, text_anchor_y, frame_width)
+            if self._static_text_key == text_key:
+                tile, offset = self._static_text_tile
+                if tile is not None:
+                    blank_canvas.paste(tile, offset)
+                return blank_canvas
+            
             draw_text_with_outline(
                 ImageDraw.Draw(blank_canvas), 
                 (text_anchor_x, text_anchor_y), 
@@ -237,6 +289,9 @@ class WaveEffect(EffectBase):
                 anchor="mm",
                 max_width=int(frame_width * 0.9)
             )
+            bbox = blank_canvas.getbbox()
+            self._static_text_key = text_key
+            self._static_text_tile = (blank_canvas.crop(bbox), bbox[:2]) if bbox else (None, None)
             return blank_canvas
         
         # Wave parameters
@@ -254,20 +309,12 @@ class WaveEffect(EffectBase):
         pil_font_color = parse_color_to_pil_format(font_color)
         pil_outline_color = parse_color_to_pil_format(outline_color)
         
-        draw = ImageDraw.Draw(blank_canvas)
-        
-        # Split text into lines for multi-line support
+        # Lines, line height and character positions are fixed for a caption; only the
+        # wave offsets change per frame
         max_width = int(frame_width * 0.9)
-        lines = self._split_text_into_lines(text, font, max_width)
-        
-        # Calculate line height and total height
-        try:
-            bbox = draw.textbbox((0, 0), "Ay", font=font)
-            line_height = bbox[3] - bbox[1]
-        except AttributeError:
-            line_height = draw.textsize("Ay", font=font)[1]
+        line_height, line_layouts = self._get_layout(text, font, max_width)
         
-        total_height = len(lines) * line_height + (len(lines) - 1) * 4  # 4px line spacing
+        total_height = len(line_layouts) * line_height + (len(line_layouts) - 1) * 4  # 4px line spacing
         
         # Calculate starting Y position based on anchor
         start_y = text_anchor_y - total_height // 2  # Center vertically
@@ -276,7 +323,7 @@ class WaveEffect(EffectBase):
         global_char_index = 0
         
         # Draw each line with wave effect
-        for line_idx, line in enumerate(lines):
+        for line_idx, (line, line_width, glyphs) in enumerate(line_layouts):
             line_y = start_y + line_idx * (line_height + 4)
             
             # Debug log for last character of line
@@ -284,66 +331,25 @@ class WaveEffect(EffectBase):
                 last_char = line[-1] if line else ''
                 print(f"[WAVE DEBUG] Line {line_idx}: '{line}' - last char: '{last_char}' (ord={ord(last_char) if last_char else 0})")
             
-            # Get line width to center it
-            try:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_width = bbox[2] - bbox[0]
-            except AttributeError:
-                line_width = draw.textsize(line, font=font)[0]
-            
             # Starting x position for this line (centered)
             line_start_x = text_anchor_x - line_width // 2
-            current_x = line_start_x
             
             # Draw each character in this line with wave offset
-            for i, char in enumerate(line):
-                if char == ' ':
-                    # Handle spaces - just advance position, don't increment global char index
-                    try:
-                        bbox = draw.textbbox((0, 0), ' ', font=font)
-                        space_width = bbox[2] - bbox[0]
-                    except AttributeError:
-                        space_width = draw.textsize(' ', font=font)[0]
-                    current_x += space_width
-                    continue
-                
+            for char, char_offset in glyphs:
                 # Calculate wave offset for this character using global position
                 wave_position = global_char_index * wave_frequency + time_offset
                 y_offset = math.sin(wave_position) * wave_amplitude
                 
-                # Character position
-                char_x = current_x
-                char_y = line_y + y_offset
-                
-                # Get character width for proper spacing
-                try:
-                    bbox = draw.textbbox((0, 0), char, font=font)
-                    char_width = bbox[2] - bbox[0]
-                except AttributeError:
-                    try:
-                        char_width = draw.textsize(char, font=font)[0]
-                    except:
-                        char_width = 10  # Fallback width
-                
-                # Draw character with outline at exact position (using left-top anchor for precision)
-                try:
-                    # Use left-top anchor for precise positioning
-                    draw.text((char_x, char_y), char, font=font, 
-                             fill=pil_font_color, anchor="lt",
-                             stroke_width=outline_width, stroke_fill=pil_outline_color)
-                except (TypeError, AttributeError):
-                    # Fallback for older PIL
-                    if outline_width > 0:
-                        for dx in range(-outline_width, outline_width + 1):
-                            for dy in range(-outline_width, outline_width + 1):
-                                if dx != 0 or dy != 0:
-                                    draw.text((char_x + dx, char_y + dy), 
-                                            char, font=font, fill=pil_outline_color, anchor="lt")
-                    draw.text((char_x, char_y), char, font=font, 
-                             fill=pil_font_color, anchor="lt")
+                # Composite the cached glyph sprite at the pixel ImageDraw.text would use
+                sprite, (dx, dy) = get_glyph_sprite(font, char, outline_width, pil_font_color, pil_outline_color)
+                x = line_start_x + char_offset + dx
+                y = math.floor(line_y + y_offset + GLYPH_SNAP) + dy
+                dest = (max(0, x), max(0, y))
+                source = (max(0, -x), max(0, -y))
+                if (source[0] < sprite.width and source[1] < sprite.height
+                        and dest[0] < blank_canvas.width and dest[1] < blank_canvas.height):
+                    blank_canvas.alpha_composite(sprite, dest, source)
                 
-                # Advance position
-                current_x += char_width
                 global_char_index += 1  # Increment global character index
         
-        return blank_canvas
\ No newline at end of file
+        return blank_canvas
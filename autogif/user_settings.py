@@ -34,6 +34,9 @@ class UserSettings(BaseModel):
 
 # --- Load and Save Functions ---
 
+# Settings as last written by save_user_settings, so unchanged settings are not rewritten
+_last_saved_settings = None
+
 def load_user_settings() -> UserSettings:
     """Loads user settings from the JSON file. Returns default settings if file not found or invalid."""
     try:
@@ -64,11 +67,16 @@ def load_user_settings() -> UserSettings:
         return UserSettings()
 
 def save_user_settings(settings: UserSettings) -> None:
-    """Saves user settings to the JSON file."""
+    """Saves user settings to the JSON file, skipping the write if nothing changed since the last save."""
+    global _last_saved_settings
     try:
+        data = settings.model_dump(mode='json')
+        if data == _last_saved_settings and os.path.exists(config.USER_CONFIG_FILE):
+            return
         os.makedirs(config.USER_CONFIG_DIR, exist_ok=True)
         with open(config.USER_CONFIG_FILE, 'w') as f:
-            json.dump(settings.model_dump(mode='json'), f, indent=4)
+            json.dump(data, f, indent=4)
+        _last_saved_settings = data
         # print(f"DEBUG: User settings saved to {config.USER_CONFIG_FILE}")
     except Exception as e:
         print(f"Error saving user settings to {config.USER_CONFIG_FILE}: {e}")